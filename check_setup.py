@@ -2,7 +2,8 @@ import sys
 import importlib
 import subprocess
 import os
-import urllib.request
+import shutil
+import socket
 
 REQUIRED_PACKAGES = [
     ("pandas", "pandas"),
@@ -36,16 +37,43 @@ pv = sys.version_info
 status = "OK" if pv >= (3, 10) else "FAIL - need 3.10+"
 print(f"\n[Python]  {pv.major}.{pv.minor}.{pv.micro}  ->  {status}")
 
-try:
-    r = subprocess.run(["git", "--version"], capture_output=True, text=True)
-    print(f"[Git]     {r.stdout.strip()}  ->  OK")
-except FileNotFoundError:
+
+def spawn_version(tool):
+    # Skip the fork/exec entirely when the tool is not on PATH
+    if shutil.which(tool) is None:
+        return None
+    return subprocess.Popen(
+        [tool, "--version"],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+
+
+def read_version(proc, timeout=10):
+    """Return the probe's version line, or None if the tool is missing or hangs."""
+    if proc is None:
+        return None
+    try:
+        return proc.communicate(timeout=timeout)[0].strip()
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        return None
+
+
+# Start both probes before waiting on either so they run in parallel
+git_proc    = spawn_version("git")
+docker_proc = spawn_version("docker")
+
+git_version = read_version(git_proc)
+if git_version is not None:
+    print(f"[Git]     {git_version}  ->  OK")
+else:
     print("[Git]     NOT FOUND  ->  FAIL")
 
-try:
-    r = subprocess.run(["docker", "--version"], capture_output=True, text=True)
-    print(f"[Docker]  {r.stdout.strip()}  ->  OK")
-except FileNotFoundError:
+docker_version = read_version(docker_proc)
+if docker_version is not None:
+    print(f"[Docker]  {docker_version}  ->  OK")
+else:
     print("[Docker]  NOT FOUND  ->  WARN")
 
 print(f"\n{'-'*55}")
@@ -73,7 +101,8 @@ for path, label in DATA_FILES:
         mb = os.path.getsize(path) / 1_048_576
         size = f"({mb:.1f} MB)"
     elif exists and os.path.isdir(path):
-        count = len([f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))])
+        with os.scandir(path) as it:
+            count = sum(1 for entry in it if entry.is_file())
         size = f"({count} files)"
     print(f"  {status:<6} {label:<35} {size}")
     if not exists:
@@ -83,9 +112,11 @@ print(f"\n{'-'*55}")
 print("  CONNECTIVITY")
 print(f"{'-'*55}")
 try:
-    urllib.request.urlopen("https://epc.opendatacommunities.org", timeout=5)
+    # A TCP connect is enough to prove reachability — no need for TLS + HTTP
+    with socket.create_connection(("epc.opendatacommunities.org", 443), timeout=2):
+        pass
     print("  OK   EPC Open Data Communities - reachable")
-except Exception:
+except OSError:
     print("  FAIL EPC Open Data Communities - not reachable")
 
 print(f"\n{'='*55}")
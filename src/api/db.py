@@ -1,6 +1,8 @@
 """DuckDB connection helper — read-only access to the processed database."""
 
 import duckdb
+import pyarrow as pa
+import threading
 from pathlib import Path
 from functools import lru_cache
 
@@ -8,12 +10,27 @@ PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DB_PATH      = PROJECT_ROOT / "data" / "processed" / "housing.duckdb"
 
 
+_local = threading.local()
+
+
 @lru_cache(maxsize=1)
-def get_connection() -> duckdb.DuckDBPyConnection:
-    """Return a cached read-only DuckDB connection."""
+def get_base_connection() -> duckdb.DuckDBPyConnection:
+    """Return the cached read-only DuckDB connection that cursors are opened from."""
     return duckdb.connect(str(DB_PATH), read_only=True)
 
 
+def get_connection() -> duckdb.DuckDBPyConnection:
+    """Return this thread's cursor on the shared database.
+
+    DuckDB serialises queries on a single connection, so each worker thread
+    gets its own cursor and concurrent requests can run in parallel.
+    """
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = _local.con = get_base_connection().cursor()
+    return con
+
+
 def query(sql: str, params: list | None = None):
     con = get_connection()
     if params:
@@ -26,3 +43,10 @@ def query_df(sql: str, params: list | None = None):
     if params:
         return con.execute(sql, params).df()
     return con.execute(sql).df()
+
+
+def query_arrow(sql: str, params: list | None = None) -> pa.Table:
+    con = get_connection()
+    if params:
+        return con.execute(sql, params).fetch_arrow_table()
+    return con.execute(sql).fetch_arrow_table()
@@ -1,7 +1,10 @@
 """Housing Retrofit AI — FastAPI backend."""
 
-from fastapi import FastAPI, HTTPException, Query
+import logging
+from fastapi import FastAPI, HTTPException, Query, Response
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from pydantic import TypeAdapter
 
 from src.api.schemas import (
     PredictRequest, PredictResponse,
@@ -9,13 +12,128 @@ from src.api.schemas import (
 )
 from src.api import db, predictor
 
+log = logging.getLogger(__name__)
+
+# Built once so each list response is validated in a single pydantic-core call
+PROPERTY_LIST_ADAPTER  = TypeAdapter(list[PropertyDetail])
+PORTFOLIO_LIST_ADAPTER = TypeAdapter(list[PortfolioSegment])
+
+
+def json_response(adapter: TypeAdapter, rows: list[dict]) -> Response:
+    """Validate rows once and serialise them in pydantic-core.
+
+    Hot list endpoints return this instead of declaring a response_model, which
+    would make FastAPI validate every row a second time on the way out.
+    """
+    return Response(adapter.dump_json(adapter.validate_python(rows)),
+                    media_type="application/json")
+
+PROPERTY_COLUMNS = """
+    lmk_key, postcode, property_type, built_form, construction_age_band,
+    tenure, current_rating, current_efficiency, potential_rating,
+    potential_efficiency, retrofit_score, retrofit_priority,
+    annual_savings_potential, co2_saving_tonnes, total_floor_area,
+    main_fuel, data_quality_score
+"""
+
+PORTFOLIO_COLUMNS = """
+    property_type, construction_age_band, retrofit_priority,
+    property_count, avg_current_efficiency, avg_potential_efficiency,
+    avg_retrofit_score, avg_annual_savings_gbp,
+    total_co2_saving_tonnes, avg_floor_area_m2
+"""
+
+# One fixed statement per filter combination, so no SQL is assembled per
+# request and every value, LIMIT/OFFSET included, is a bound parameter
+PROPERTY_BY_KEY_SQL = f"""
+    SELECT {PROPERTY_COLUMNS}
+    FROM gold.epc_features
+    WHERE lmk_key = ?
+    LIMIT 1
+"""
+
+PROPERTY_LIST_SQL = f"""
+    SELECT {PROPERTY_COLUMNS}
+    FROM gold.epc_features
+    ORDER BY retrofit_score DESC
+    LIMIT ? OFFSET ?
+"""
+
+PROPERTY_LIST_BY_PRIORITY_SQL = f"""
+    SELECT {PROPERTY_COLUMNS}
+    FROM gold.epc_features
+    WHERE retrofit_priority = ?
+    ORDER BY retrofit_score DESC
+    LIMIT ? OFFSET ?
+"""
+
+PORTFOLIO_SQL = f"""
+    SELECT {PORTFOLIO_COLUMNS}
+    FROM gold.portfolio_agg
+    ORDER BY avg_retrofit_score DESC
+"""
+
+PORTFOLIO_BY_TYPE_SQL = f"""
+    SELECT {PORTFOLIO_COLUMNS}
+    FROM gold.portfolio_agg
+    WHERE property_type = ?
+    ORDER BY avg_retrofit_score DESC
+"""
+
+PORTFOLIO_BY_PRIORITY_SQL = f"""
+    SELECT {PORTFOLIO_COLUMNS}
+    FROM gold.portfolio_agg
+    WHERE retrofit_priority = ?
+    ORDER BY avg_retrofit_score DESC
+"""
+
+PORTFOLIO_BY_TYPE_AND_PRIORITY_SQL = f"""
+    SELECT {PORTFOLIO_COLUMNS}
+    FROM gold.portfolio_agg
+    WHERE property_type = ? AND retrofit_priority = ?
+    ORDER BY avg_retrofit_score DESC
+"""
+
+SUMMARY_SQL = """
+    SELECT
+        COUNT(*)                                          AS total_properties,
+        AVG(current_efficiency)                           AS avg_current_efficiency,
+        AVG(retrofit_score)                               AS avg_retrofit_score,
+        COUNT(*) FILTER (WHERE retrofit_priority='High')   AS high_priority_count,
+        COUNT(*) FILTER (WHERE retrofit_priority='Medium') AS medium_priority_count,
+        COUNT(*) FILTER (WHERE retrofit_priority='Low')    AS low_priority_count,
+        SUM(annual_savings_potential) / 1e6               AS total_savings_potential_m_gbp,
+        SUM(co2_saving_tonnes)                            AS total_co2_saving_tonnes
+    FROM gold.epc_features
+"""
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load model and DB connection once at startup
-    predictor.get_predictor()
+    predictor.configure_threads()
+    p = predictor.get_predictor()
+    try:
+        p.warmup()
+    except Exception:
+        # A failed warm-up only costs first-request latency; keep serving
+        log.exception("Model warm-up failed")
     db.get_connection()
+
+    # The database is opened read-only, so whole-table aggregates never change
+    # for the life of the process — compute them once up front
+    try:
+        all_portfolio_json()
+        summary()
+    except Exception:
+        # e.g. gold tables not built yet; lru_cache doesn't cache the failure,
+        # so the first request retries, and /health still reports degraded
+        log.exception("Aggregate cache pre-warm failed")
+
+    app.state.batcher = predictor.BatchingPredictor(p)
+    app.state.batcher.start()
     yield
+    await app.state.batcher.stop()
 
 
 app = FastAPI(
@@ -46,10 +164,9 @@ def health():
 
 
 @app.post("/predict", response_model=PredictResponse, tags=["Prediction"])
-def predict(body: PredictRequest):
+async def predict(body: PredictRequest):
     """Run the fusion model on submitted property features and return a retrofit score."""
-    p = predictor.get_predictor()
-    result = p.predict(
+    result = await app.state.batcher.predict(
         text_summary=body.text_summary,
         structured_fields={
             "walls_eff_score":     body.walls_eff_score,
@@ -68,129 +185,85 @@ def predict(body: PredictRequest):
 @app.get("/properties/{lmk_key}", response_model=PropertyDetail, tags=["Properties"])
 def get_property(lmk_key: str):
     """Fetch a property from the gold layer by its LMK key."""
-    rows = db.query(
-        """
-        SELECT lmk_key, postcode, property_type, built_form, construction_age_band,
-               tenure, current_rating, current_efficiency, potential_rating,
-               potential_efficiency, retrofit_score, retrofit_priority,
-               annual_savings_potential, co2_saving_tonnes, total_floor_area,
-               main_fuel, data_quality_score
-        FROM gold.epc_features
-        WHERE lmk_key = ?
-        LIMIT 1
-        """,
-        [lmk_key],
-    )
-    if not rows:
+    rows = db.query_arrow(PROPERTY_BY_KEY_SQL, [lmk_key])
+    if rows.num_rows == 0:
         raise HTTPException(status_code=404, detail="Property not found")
 
-    cols = [
-        "lmk_key", "postcode", "property_type", "built_form", "construction_age_band",
-        "tenure", "current_rating", "current_efficiency", "potential_rating",
-        "potential_efficiency", "retrofit_score", "retrofit_priority",
-        "annual_savings_potential", "co2_saving_tonnes", "total_floor_area",
-        "main_fuel", "data_quality_score",
-    ]
-    return PropertyDetail(**dict(zip(cols, rows[0])))
+    return PropertyDetail.model_validate(rows.to_pylist()[0])
 
 
-@app.get("/properties", response_model=list[PropertyDetail], tags=["Properties"])
+@app.get(
+    "/properties",
+    response_model=None,
+    responses={200: {"model": list[PropertyDetail]}},
+    tags=["Properties"],
+)
 def list_properties(
     priority: str | None = Query(None, description="Filter by retrofit_priority: High, Medium, Low"),
     limit: int = Query(20, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
     """List properties from the gold layer, optionally filtered by retrofit priority."""
-    where = "WHERE retrofit_priority = ?" if priority else ""
-    params = [priority] if priority else []
-
-    rows = db.query(
-        f"""
-        SELECT lmk_key, postcode, property_type, built_form, construction_age_band,
-               tenure, current_rating, current_efficiency, potential_rating,
-               potential_efficiency, retrofit_score, retrofit_priority,
-               annual_savings_potential, co2_saving_tonnes, total_floor_area,
-               main_fuel, data_quality_score
-        FROM gold.epc_features
-        {where}
-        ORDER BY retrofit_score DESC
-        LIMIT {limit} OFFSET {offset}
-        """,
-        params or None,
-    )
+    if priority:
+        rows = db.query_arrow(PROPERTY_LIST_BY_PRIORITY_SQL, [priority, limit, offset])
+    else:
+        rows = db.query_arrow(PROPERTY_LIST_SQL, [limit, offset])
 
-    cols = [
-        "lmk_key", "postcode", "property_type", "built_form", "construction_age_band",
-        "tenure", "current_rating", "current_efficiency", "potential_rating",
-        "potential_efficiency", "retrofit_score", "retrofit_priority",
-        "annual_savings_potential", "co2_saving_tonnes", "total_floor_area",
-        "main_fuel", "data_quality_score",
-    ]
-    return [PropertyDetail(**dict(zip(cols, row))) for row in rows]
+    return json_response(PROPERTY_LIST_ADAPTER, rows.to_pylist())
 
 
-@app.get("/portfolio", response_model=list[PortfolioSegment], tags=["Portfolio"])
+@app.get(
+    "/portfolio",
+    response_model=None,
+    responses={200: {"model": list[PortfolioSegment]}},
+    tags=["Portfolio"],
+)
 def portfolio(
     property_type: str | None = Query(None),
     priority: str | None = Query(None),
 ):
     """Return aggregated portfolio statistics, optionally filtered."""
-    conditions = []
-    params = []
-    if property_type:
-        conditions.append("property_type = ?")
-        params.append(property_type)
-    if priority:
-        conditions.append("retrofit_priority = ?")
-        params.append(priority)
-
-    where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
-
-    rows = db.query(
-        f"""
-        SELECT property_type, construction_age_band, retrofit_priority,
-               property_count, avg_current_efficiency, avg_potential_efficiency,
-               avg_retrofit_score, avg_annual_savings_gbp,
-               total_co2_saving_tonnes, avg_floor_area_m2
-        FROM gold.portfolio_agg
-        {where}
-        ORDER BY avg_retrofit_score DESC
-        """,
-        params or None,
-    )
+    if property_type and priority:
+        rows = db.query_arrow(PORTFOLIO_BY_TYPE_AND_PRIORITY_SQL, [property_type, priority])
+    elif property_type:
+        rows = db.query_arrow(PORTFOLIO_BY_TYPE_SQL, [property_type])
+    elif priority:
+        rows = db.query_arrow(PORTFOLIO_BY_PRIORITY_SQL, [priority])
+    else:
+        return Response(all_portfolio_json(), media_type="application/json")
+
+    return json_response(PORTFOLIO_LIST_ADAPTER, rows.to_pylist())
 
-    cols = [
-        "property_type", "construction_age_band", "retrofit_priority",
-        "property_count", "avg_current_efficiency", "avg_potential_efficiency",
-        "avg_retrofit_score", "avg_annual_savings_gbp",
-        "total_co2_saving_tonnes", "avg_floor_area_m2",
-    ]
-    return [PortfolioSegment(**dict(zip(cols, row))) for row in rows]
+
+@lru_cache(maxsize=1)
+def all_portfolio_json() -> bytes:
+    """Unfiltered portfolio as JSON, cached since the read-only database never changes."""
+    rows = db.query_arrow(PORTFOLIO_SQL)
+    return json_response(PORTFOLIO_LIST_ADAPTER, rows.to_pylist()).body
 
 
 @app.get("/stats/summary", tags=["Portfolio"])
 def summary_stats():
     """High-level headline figures across the full dataset."""
-    row = db.query("""
-        SELECT
-            COUNT(*)                                   AS total_properties,
-            ROUND(AVG(current_efficiency), 1)          AS avg_current_efficiency,
-            ROUND(AVG(retrofit_score), 1)              AS avg_retrofit_score,
-            SUM(CASE WHEN retrofit_priority='High' THEN 1 ELSE 0 END)   AS high_priority_count,
-            SUM(CASE WHEN retrofit_priority='Medium' THEN 1 ELSE 0 END) AS medium_priority_count,
-            SUM(CASE WHEN retrofit_priority='Low' THEN 1 ELSE 0 END)    AS low_priority_count,
-            ROUND(SUM(annual_savings_potential) / 1e6, 2) AS total_savings_potential_m_gbp,
-            ROUND(SUM(co2_saving_tonnes), 0)           AS total_co2_saving_tonnes
-        FROM gold.epc_features
-    """)[0]
+    return summary()
+
+
+@lru_cache(maxsize=1)
+def summary() -> dict:
+    """Headline figures, cached since the read-only database never changes."""
+    row = db.query(SUMMARY_SQL)[0]
+
+    def rounded(value, ndigits):
+        # Aggregates are NULL on an empty table
+        return None if value is None else round(value, ndigits)
 
     return {
         "total_properties":            row[0],
-        "avg_current_efficiency":      row[1],
-        "avg_retrofit_score":          row[2],
+        "avg_current_efficiency":      rounded(row[1], 1),
+        "avg_retrofit_score":          rounded(row[2], 1),
         "high_priority_count":         row[3],
         "medium_priority_count":       row[4],
         "low_priority_count":          row[5],
-        "total_savings_potential_m_gbp": row[6],
-        "total_co2_saving_tonnes":     row[7],
+        "total_savings_potential_m_gbp": rounded(row[6], 2),
+        "total_co2_saving_tonnes":     rounded(row[7], 0),
     }
@@ -14,6 +14,8 @@ from src.api.predictor import get_predictor
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 DB_PATH      = PROJECT_ROOT / "data" / "processed" / "housing.duckdb"
 
+SCATTER_SAMPLE_SIZE = 3000
+
 st.set_page_config(
     page_title="Housing Retrofit AI",
     page_icon="🏠",
@@ -23,7 +25,24 @@ st.set_page_config(
 
 @st.cache_resource
 def get_db():
-    return duckdb.connect(str(DB_PATH), read_only=True)
+    con = duckdb.connect(str(DB_PATH), read_only=True)
+    # Draw the scatter sample once per process instead of re-sampling the
+    # full feature table on every cache miss
+    con.execute(f"""
+        CREATE TEMP TABLE scatter_sample AS
+        SELECT current_efficiency, potential_efficiency,
+               retrofit_score, property_type, retrofit_priority
+        FROM gold.epc_features
+        USING SAMPLE {SCATTER_SAMPLE_SIZE}
+    """)
+    return con
+
+
+def query_df(sql: str, params: list | None = None) -> pd.DataFrame:
+    # DuckDB's Arrow path skips pandas block construction; Arrow-backed
+    # columns also keep the cached values small when Streamlit pickles them
+    rel = get_db().execute(sql, params) if params else get_db().execute(sql)
+    return rel.fetch_arrow_table().to_pandas(types_mapper=pd.ArrowDtype)
 
 
 @st.cache_data
@@ -43,29 +62,29 @@ def load_summary():
 
 @st.cache_data
 def load_priority_dist():
-    return get_db().execute("""
+    return query_df("""
         SELECT retrofit_priority, COUNT(*) AS n
         FROM gold.epc_features
         GROUP BY retrofit_priority
         ORDER BY n DESC
-    """).df()
+    """)
 
 
 @st.cache_data
 def load_efficiency_by_type():
-    return get_db().execute("""
+    return query_df("""
         SELECT property_type,
                ROUND(AVG(current_efficiency), 1)  AS avg_current,
                ROUND(AVG(potential_efficiency), 1) AS avg_potential
         FROM gold.epc_features
         GROUP BY property_type
         ORDER BY avg_current
-    """).df()
+    """)
 
 
 @st.cache_data
 def load_score_by_age():
-    return get_db().execute("""
+    return query_df("""
         SELECT construction_age_band,
                ROUND(AVG(retrofit_score), 1) AS avg_score,
                COUNT(*) AS n
@@ -73,24 +92,23 @@ def load_score_by_age():
         WHERE construction_age_band IS NOT NULL
         GROUP BY construction_age_band
         ORDER BY avg_score DESC
-    """).df()
+    """)
 
 
 @st.cache_data
 def load_savings_by_type():
-    return get_db().execute("""
+    return query_df("""
         SELECT property_type,
                ROUND(AVG(annual_savings_potential), 0) AS avg_savings
         FROM gold.epc_features
         GROUP BY property_type
         ORDER BY avg_savings DESC
-    """).df()
+    """)
 
 
 @st.cache_data
 def load_top_properties(priority: str, limit: int):
-    where = f"WHERE retrofit_priority = '{priority}'" if priority != "All" else ""
-    return get_db().execute(f"""
+    return query_df("""
         SELECT postcode, property_type, built_form, construction_age_band,
                current_rating, current_efficiency, potential_rating, potential_efficiency,
                retrofit_score, retrofit_priority,
@@ -98,20 +116,26 @@ def load_top_properties(priority: str, limit: int):
                ROUND(co2_saving_tonnes, 1) AS co2_saving_tonnes,
                main_fuel, data_quality_score
         FROM gold.epc_features
-        {where}
+        WHERE (? = 'All' OR retrofit_priority = ?)
         ORDER BY retrofit_score DESC
-        LIMIT {limit}
-    """).df()
+        LIMIT ?
+    """, [priority, priority, limit])
 
 
 @st.cache_data
-def load_efficiency_scatter(n: int = 3000):
-    return get_db().execute(f"""
+def top_properties_csv(priority: str, limit: int) -> bytes:
+    # Serialised once per (priority, limit) rather than on every rerun
+    return load_top_properties(priority, limit).to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data
+def load_efficiency_scatter(n: int = SCATTER_SAMPLE_SIZE):
+    return query_df("""
         SELECT current_efficiency, potential_efficiency,
                retrofit_score, property_type, retrofit_priority
-        FROM gold.epc_features
-        USING SAMPLE {n}
-    """).df()
+        FROM scatter_sample
+        LIMIT ?
+    """, [n])
 
 
 # ── Sidebar navigation ────────────────────────────────────────────────────────
@@ -228,13 +252,13 @@ elif page == "Portfolio Explorer":
         st.plotly_chart(fig2, use_container_width=True)
 
     st.subheader("Portfolio Aggregation Table")
-    df_agg = get_db().execute("""
+    df_agg = query_df("""
         SELECT property_type, construction_age_band, retrofit_priority,
                property_count, avg_retrofit_score, avg_annual_savings_gbp,
                total_co2_saving_tonnes, avg_current_efficiency
         FROM gold.portfolio_agg
         ORDER BY avg_retrofit_score DESC
-    """).df()
+    """)
 
     pri_filter = st.selectbox("Filter by priority", ["All", "High", "Medium", "Low"])
     if pri_filter != "All":
@@ -263,7 +287,7 @@ elif page == "Top Properties":
 
     st.download_button(
         "Download as CSV",
-        df.to_csv(index=False),
+        top_properties_csv(priority, limit),
         file_name="top_retrofit_properties.csv",
         mime="text/csv",
     )
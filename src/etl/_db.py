@@ -0,0 +1,44 @@
+"""DuckDB connection helper shared by the ETL layers."""
+
+import duckdb
+import os
+from pathlib import Path
+
+
+def connect(db_path: str) -> duckdb.DuckDBPyConnection:
+    """Open the pipeline database tuned for bulk CSV parsing and aggregation."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    config = {
+        "threads": os.cpu_count() or 1,
+        # Nothing downstream relies on physical row order, and dropping it lets
+        # the CSV reader and GROUP BYs skip order-tracking bookkeeping
+        "preserve_insertion_order": False,
+    }
+    # Optional cap, e.g. DUCKDB_MEMORY_LIMIT=8GB; DuckDB defaults to 80% of RAM
+    memory_limit = os.environ.get("DUCKDB_MEMORY_LIMIT")
+    if memory_limit:
+        config["memory_limit"] = memory_limit
+    return duckdb.connect(db_path, config=config)
+
+
+def refresh_table(con: duckdb.DuckDBPyConnection, table: str, select_sql: str,
+                  params: list | None = None) -> None:
+    """Replace the rows of table with select_sql's, keeping the table if it still fits.
+
+    When the existing table has the same columns and types as the query, it is
+    truncated and refilled, keeping its catalog entry; otherwise (first run, or
+    the query's schema changed) it is recreated. Drop the table's indexes before
+    calling and rebuild them after, or the refill pays for index maintenance.
+    """
+    new_schema = [row[:2] for row in con.execute(f"DESCRIBE {select_sql}", params).fetchall()]
+    try:
+        old_schema = [row[:2] for row in con.execute(f"DESCRIBE {table}").fetchall()]
+    except duckdb.CatalogException:
+        old_schema = None
+
+    if old_schema == new_schema:
+        con.execute(f"TRUNCATE {table}")
+        con.execute(f"INSERT INTO {table} BY NAME {select_sql}", params)
+    else:
+        con.execute(f"CREATE OR REPLACE TABLE {table} AS {select_sql}", params)
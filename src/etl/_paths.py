@@ -0,0 +1,16 @@
+"""Filesystem locations shared by the ETL layers."""
+
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=1)
+def project_root() -> Path:
+    return Path(__file__).resolve().parents[2]
+
+
+RAW_CSV = project_root() / "data" / "raw" / "certificates.csv"
+DB_PATH = project_root() / "data" / "processed" / "housing.duckdb"
+
+# Hive-partitioned Parquet copy of gold.epc_features
+GOLD_EXPORT_DIR = project_root() / "data" / "processed" / "gold"
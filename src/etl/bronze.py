@@ -1,40 +1,71 @@
-"""Bronze layer — raw EPC CSV ingestion into DuckDB, no transformations."""
+"""Bronze layer — raw EPC CSV ingestion into DuckDB, typed at parse time, no transformations."""
 
 import duckdb
-import os
 from datetime import datetime
-from pathlib import Path
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-RAW_CSV      = PROJECT_ROOT / "data" / "raw" / "certificates.csv"
-DB_PATH      = PROJECT_ROOT / "data" / "processed" / "housing.duckdb"
+from src.etl._db import connect, refresh_table
+from src.etl._paths import DB_PATH, RAW_CSV
 
+# Columns parsed straight to their final type during ingest; everything else
+# stays VARCHAR. Sparse fields that can hold placeholder text
+# (NUMBER_HABITABLE_ROOMS, PHOTO_SUPPLY) are left to silver's TRY_CAST.
+EPC_SCHEMA = {
+    "CURRENT_ENERGY_EFFICIENCY":   "INTEGER",
+    "POTENTIAL_ENERGY_EFFICIENCY": "INTEGER",
+    "TOTAL_FLOOR_AREA":            "DOUBLE",
+    "CO2_EMISSIONS_CURRENT":       "DOUBLE",
+    "CO2_EMISSIONS_POTENTIAL":     "DOUBLE",
+    "HEATING_COST_CURRENT":        "DOUBLE",
+    "HEATING_COST_POTENTIAL":      "DOUBLE",
+    "HOT_WATER_COST_CURRENT":      "DOUBLE",
+    "HOT_WATER_COST_POTENTIAL":    "DOUBLE",
+    "LIGHTING_COST_CURRENT":       "DOUBLE",
+    "LIGHTING_COST_POTENTIAL":     "DOUBLE",
+    "INSPECTION_DATE":             "DATE",
+    "LODGEMENT_DATE":              "DATE",
+    "LODGEMENT_DATETIME":          "TIMESTAMP",
+}
 
-def run(db_path: str = str(DB_PATH), csv_path: str = str(RAW_CSV)) -> dict:
-    print("[bronze] Starting ingestion...")
 
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+def run(db_path: str = str(DB_PATH), csv_path: str = str(RAW_CSV),
+        con: duckdb.DuckDBPyConnection | None = None) -> dict:
+    print("[bronze] Starting ingestion...")
 
-    con = duckdb.connect(db_path)
+    owns_con = con is None
+    if owns_con:
+        con = connect(db_path)
     con.execute("CREATE SCHEMA IF NOT EXISTS bronze")
-    con.execute("DROP TABLE IF EXISTS bronze.epc_raw")
 
-    con.execute(f"""
-        CREATE TABLE bronze.epc_raw AS
-        SELECT
-            *,
-            '{csv_path}'      AS _source_file,
-            CURRENT_TIMESTAMP AS _ingested_at
-        FROM read_csv_auto('{csv_path}', header=true, all_varchar=true)
+    # Create (or empty) the typed table, then bulk-load it with COPY, DuckDB's
+    # direct CSV load path. The sniffer only has to find column names here, so a
+    # small sample is enough; COPY gets the dialect spelled out and skips sniffing.
+    refresh_table(con, "bronze.epc_raw", """
+        SELECT * FROM read_csv(?, header=true, all_varchar=true, types=?, sample_size=2048)
+        LIMIT 0
+    """, [csv_path, EPC_SCHEMA])
+    con.execute("""
+        COPY bronze.epc_raw FROM ?
+        (FORMAT CSV, HEADER, DELIMITER ',', QUOTE '"', ESCAPE '"', AUTO_DETECT false)
+    """, [csv_path])
+
+    # Lineage is kept in a one-row table and joined on by a view, instead of
+    # being written out on every ingested row
+    refresh_table(con, "bronze.epc_ingest", """
+        SELECT ? AS _source_file, CURRENT_TIMESTAMP AS _ingested_at
+    """, [csv_path])
+    con.execute("""
+        CREATE OR REPLACE VIEW bronze.epc_raw_v AS
+        SELECT * FROM bronze.epc_raw CROSS JOIN bronze.epc_ingest
     """)
 
-    row_count = con.execute("SELECT COUNT(*) FROM bronze.epc_raw").fetchone()[0]
-    col_count = con.execute(
-        "SELECT COUNT(*) FROM information_schema.columns "
-        "WHERE table_schema='bronze' AND table_name='epc_raw'"
-    ).fetchone()[0]
+    row_count, col_count = con.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM bronze.epc_raw),
+            (SELECT COUNT(*) FROM pragma_table_info('bronze.epc_raw'))
+    """).fetchone()
 
-    con.close()
+    if owns_con:
+        con.close()
 
     print(f"[bronze] Done -- {row_count:,} rows, {col_count} columns -> bronze.epc_raw")
     return {
@@ -1,23 +1,45 @@
 """Gold layer — retrofit scoring, financial savings, and portfolio aggregation."""
 
 import duckdb
-from pathlib import Path
 from datetime import datetime
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DB_PATH      = PROJECT_ROOT / "data" / "processed" / "housing.duckdb"
+from src.etl._db import connect, refresh_table
+from src.etl._paths import DB_PATH, GOLD_EXPORT_DIR
+from src.etl.silver import _create_macros, _silver_sql
 
 
-def run(db_path: str = str(DB_PATH)) -> dict:
+def run(db_path: str = str(DB_PATH), export_dir: str = str(GOLD_EXPORT_DIR),
+        con: duckdb.DuckDBPyConnection | None = None) -> dict:
     print("[gold] Starting feature engineering...")
 
-    con = duckdb.connect(db_path)
+    owns_con = con is None
+    if owns_con:
+        con = connect(db_path)
     con.execute("CREATE SCHEMA IF NOT EXISTS gold")
-    con.execute("DROP TABLE IF EXISTS gold.epc_features")
-    con.execute("DROP TABLE IF EXISTS gold.portfolio_agg")
-
-    con.execute("""
-        CREATE TABLE gold.epc_features AS
+    _create_macros(con)
+
+    # Refilling an indexed table updates the index row by row, which is far
+    # slower than building it once over the finished table
+    con.execute("DROP INDEX IF EXISTS gold.idx_epc_features_lmk_key")
+
+    # Silver is computed inline rather than read back from storage
+    refresh_table(con, "gold.epc_features", f"""
+        WITH silver_clean AS ({_silver_sql()}),
+        -- Name shared subexpressions once so each is evaluated once per row
+        base AS (
+            SELECT
+                *,
+                potential_efficiency - current_efficiency AS _rs,
+                COALESCE(heating_cost_current,     0)     AS _hc,
+                COALESCE(heating_cost_potential,   0)     AS _hp,
+                COALESCE(hot_water_cost_current,   0)     AS _hwc,
+                COALESCE(hot_water_cost_potential, 0)     AS _hwp,
+                COALESCE(lighting_cost_current,    0)     AS _lc,
+                COALESCE(lighting_cost_potential,  0)     AS _lp
+            FROM silver_clean
+            WHERE current_efficiency   BETWEEN 1 AND 100
+              AND potential_efficiency BETWEEN 1 AND 100
+        )
         SELECT
             lmk_key,
             uprn,
@@ -39,26 +61,17 @@ def run(db_path: str = str(DB_PATH)) -> dict:
             potential_rating,
             potential_efficiency,
 
-            (potential_efficiency - current_efficiency) AS retrofit_score,
+            _rs AS retrofit_score,
 
             CASE
-                WHEN (potential_efficiency - current_efficiency) >= 20 THEN 'High'
-                WHEN (potential_efficiency - current_efficiency) >= 10 THEN 'Medium'
+                WHEN _rs >= 20 THEN 'High'
+                WHEN _rs >= 10 THEN 'Medium'
                 ELSE 'Low'
             END AS retrofit_priority,
 
-            COALESCE(heating_cost_current,    0)
-            + COALESCE(hot_water_cost_current, 0)
-            + COALESCE(lighting_cost_current,  0)  AS total_cost_current,
-
-            COALESCE(heating_cost_potential,    0)
-            + COALESCE(hot_water_cost_potential, 0)
-            + COALESCE(lighting_cost_potential,  0) AS total_cost_potential,
-
-            (COALESCE(heating_cost_current,    0) - COALESCE(heating_cost_potential,    0))
-            + (COALESCE(hot_water_cost_current, 0) - COALESCE(hot_water_cost_potential, 0))
-            + (COALESCE(lighting_cost_current,  0) - COALESCE(lighting_cost_potential,  0))
-                                                    AS annual_savings_potential,
+            _hc + _hwc + _lc                          AS total_cost_current,
+            _hp + _hwp + _lp                          AS total_cost_potential,
+            (_hc - _hp) + (_hwc - _hwp) + (_lc - _lp) AS annual_savings_potential,
 
             ROUND(co2_current - co2_potential, 2)  AS co2_saving_tonnes,
 
@@ -76,6 +89,21 @@ def run(db_path: str = str(DB_PATH)) -> dict:
             lighting_description,
             data_quality_score,
 
+            lodgement_date
+
+        FROM base
+    """)
+
+    # The API's /properties/{lmk_key} is a point lookup; without an index it
+    # scans the whole table per request
+    con.execute("CREATE INDEX idx_epc_features_lmk_key ON gold.epc_features (lmk_key)")
+
+    # text_summary is by far the widest column but only the embedding step reads
+    # it, so it is built on demand rather than stored in epc_features
+    con.execute("""
+        CREATE OR REPLACE VIEW gold.epc_features_text AS
+        SELECT
+            lmk_key,
             -- Sentence-transformer input: structured description of each property
             CONCAT(
                 'This is a ', LOWER(COALESCE(property_type, 'residential property')),
@@ -90,21 +118,19 @@ def run(db_path: str = str(DB_PATH)) -> dict:
                 ' Windows: ', LOWER(COALESCE(windows_description, 'unknown')), '.',
                 ' Heating: ', LOWER(COALESCE(heating_description, 'unknown')), '.',
                 ' Main fuel: ', LOWER(COALESCE(main_fuel, 'unknown')), '.'
-            ) AS text_summary,
-
-            lodgement_date
-
-        FROM silver.epc_clean
-        WHERE current_efficiency   BETWEEN 1 AND 100
-          AND potential_efficiency BETWEEN 1 AND 100
+            ) AS text_summary
+        FROM gold.epc_features
     """)
 
+    # One scan of epc_features aggregates both the portfolio segments and the
+    # per-priority breakdown; _level is 0 for segment rows, 3 for priority totals
     con.execute("""
-        CREATE TABLE gold.portfolio_agg AS
+        CREATE OR REPLACE TEMP TABLE portfolio_rollup AS
         SELECT
             property_type,
             construction_age_band,
             retrofit_priority,
+            GROUPING(property_type, construction_age_band) AS _level,
             COUNT(*)                                AS property_count,
             ROUND(AVG(current_efficiency), 1)       AS avg_current_efficiency,
             ROUND(AVG(potential_efficiency), 1)     AS avg_potential_efficiency,
@@ -113,37 +139,54 @@ def run(db_path: str = str(DB_PATH)) -> dict:
             ROUND(SUM(co2_saving_tonnes), 1)        AS total_co2_saving_tonnes,
             ROUND(AVG(total_floor_area), 1)         AS avg_floor_area_m2
         FROM gold.epc_features
-        GROUP BY property_type, construction_age_band, retrofit_priority
+        GROUP BY GROUPING SETS (
+            (property_type, construction_age_band, retrofit_priority),
+            (retrofit_priority)
+        )
+    """)
+
+    refresh_table(con, "gold.portfolio_agg", """
+        SELECT * EXCLUDE (_level)
+        FROM portfolio_rollup
+        WHERE _level = 0
         ORDER BY avg_retrofit_score DESC
     """)
 
-    feat_count = con.execute("SELECT COUNT(*) FROM gold.epc_features").fetchone()[0]
+    score_stats = con.execute("""
+        SELECT retrofit_priority, property_count, avg_retrofit_score, avg_annual_savings_gbp
+        FROM portfolio_rollup
+        WHERE _level = 3
+        ORDER BY avg_retrofit_score DESC
+    """).fetch_arrow_table()
+
+    feat_count = sum(score_stats["property_count"].to_pylist())
     agg_count  = con.execute("SELECT COUNT(*) FROM gold.portfolio_agg").fetchone()[0]
 
-    score_stats = con.execute("""
-        SELECT
-            retrofit_priority,
-            COUNT(*) AS n,
-            ROUND(AVG(retrofit_score), 1) AS avg_score,
-            ROUND(AVG(annual_savings_potential), 0) AS avg_savings
-        FROM gold.epc_features
-        GROUP BY retrofit_priority
-        ORDER BY avg_score DESC
-    """).fetchall()
+    # Partitioned by age band so readers filtering on it only open the matching
+    # files, e.g. read_parquet('.../gold/**/*.parquet', hive_partitioning=true).
+    # ZSTD keeps the string-heavy description columns small on disk.
+    con.execute("""
+        COPY gold.epc_features TO ?
+        (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 122880,
+         PARTITION_BY (construction_age_band), OVERWRITE)
+    """, [export_dir])
 
-    con.close()
+    if owns_con:
+        con.close()
 
     print(f"[gold] Done -- {feat_count:,} feature rows, {agg_count} portfolio segments")
     print("[gold] Retrofit priority breakdown:")
-    for row in score_stats:
-        print(f"  {row[0]:<8} {row[1]:>7,} properties  |  avg score {row[2]}  |  avg savings GBP{row[3]:,}/yr")
+    for priority, n, score, savings in zip(*(col.to_pylist() for col in score_stats.columns)):
+        print(f"  {priority:<8} {n:>7,} properties  |  avg score {score}  |  avg savings GBP{savings:,}/yr")
 
     return {
         "layer":          "gold",
         "features_table": "gold.epc_features",
+        "text_view":      "gold.epc_features_text",
         "agg_table":      "gold.portfolio_agg",
         "feature_rows":   feat_count,
         "agg_segments":   agg_count,
+        "export_dir":     export_dir,
         "db_path":        db_path,
         "completed":      datetime.now().isoformat(),
     }
@@ -2,6 +2,8 @@
 
 import time
 from src.etl import bronze, silver, gold
+from src.etl._db import connect
+from src.etl._paths import DB_PATH
 
 
 def run():
@@ -11,9 +13,12 @@ def run():
 
     start = time.time()
 
-    b = bronze.run()
-    s = silver.run()
-    g = gold.run()
+    # One connection for all three layers: settings are applied once and the
+    # database is checkpointed once on close, not after every layer
+    with connect(str(DB_PATH)) as con:
+        b = bronze.run(con=con)
+        s = silver.run(con=con)
+        g = gold.run(con=con)
 
     elapsed = round(time.time() - start, 1)
 